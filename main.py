@@ -12,9 +12,11 @@ Usage:
 
 import os
 import sys
+import queue
+import atexit
 import logging
+import logging.handlers
 import argparse
-from dotenv import load_dotenv
 
 from src.duolingo_api import (
     DuolingoClient,
@@ -22,25 +24,41 @@ from src.duolingo_api import (
     DuolingoAPIError
 )
 from src.streak_manager import StreakManager
-from src.notifications import NotificationService
 
 
 def setup_logging(log_level="INFO"):
     """Configure logging to console and file"""
     level = getattr(logging, log_level.upper(), logging.INFO)
+    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+    # File writes happen on a background thread so logging never blocks
+    # the caller on disk I/O
+    log_queue = queue.Queue(-1)
+    file_handler = logging.FileHandler('duo-streak-keeper.log', delay=True)
+    file_handler.setFormatter(logging.Formatter(log_format))
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # The file handler applies the full format; the queue only carries the
+    # message (with any traceback) so it isn't formatted twice
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
 
     logging.basicConfig(
         level=level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        format=log_format,
         handlers=[
             logging.StreamHandler(sys.stdout),
-            logging.FileHandler('duo-streak-keeper.log')
+            queue_handler
         ]
     )
 
 
 def load_config():
     """Load configuration from environment variables"""
+    from dotenv import load_dotenv
+
     load_dotenv()
 
     config = {
@@ -97,6 +115,9 @@ def main():
     if args.dry_run:
         logger.info("DRY RUN MODE - No purchases will be made")
 
+    client = None
+    notifier = None
+
     try:
         # Initialize Duolingo client
         logger.info("Authenticating with Duolingo...")
@@ -107,9 +128,11 @@ def main():
 
         client.login()
 
-        # Initialize notification service (if configured)
-        notifier = None
-        if not args.no_email and config['smtp_username'] and config['notification_email']:
+        # Initialize notification service (if configured; --status never sends)
+        if (not args.status and not args.no_email
+                and config['smtp_username'] and config['notification_email']):
+            from src.notifications import NotificationService
+
             notifier = NotificationService(
                 smtp_host=config['smtp_host'],
                 smtp_port=config['smtp_port'],
@@ -174,6 +197,13 @@ def main():
         print(f"\nERROR: {e}")
         sys.exit(1)
 
+    finally:
+        if notifier:
+            # Sends anything queued during the run before disconnecting
+            notifier.close()
+        if client:
+            client.close()
+
 
 if __name__ == "__main__":
     main()
@@ -8,13 +8,47 @@ Based on reverse-engineered endpoints from the Duolingo web application.
     Use at your own risk. May violate Duolingo's Terms of Service.
 """
 
-import requests
+import httpx
+import orjson
 import logging
 import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Dict, Optional, List
+from urllib.parse import quote
 
 logger = logging.getLogger(__name__)
 
+# User fields read by this client; requesting only these keeps the
+# user data payload small
+USER_FIELDS = (
+    "id",
+    "site_streak",
+    "streak_extended_today",
+    "inventory",
+    "rupees",
+    "lingots",
+    "gems",
+)
+_DEFAULT_FIELDS = ",".join(USER_FIELDS)
+
+# Price of one streak freeze, in gems
+STREAK_FREEZE_COST = 200
+
+# Transient failures worth retrying, with exponential backoff between attempts.
+# POSTs aren't idempotent: login only retries when rate limited, and the
+# shop purchase is never retried on a status code (a 5xx may mean the
+# gems were already spent upstream)
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+LOGIN_RETRY_STATUSES = frozenset({429})
+NO_RETRY_STATUSES = frozenset()
+
+# Longest Retry-After (seconds) we are willing to sleep for
+MAX_RETRY_AFTER = 60.0
+
 
 class DuolingoAPIError(Exception):
     """Base exception for Duolingo API errors"""
@@ -36,6 +70,17 @@ class AlreadyOwnedError(DuolingoAPIError):
     pass
 
 
+@dataclass
+class UserSnapshot:
+    """Gem and streak state read from a single pass over the user data"""
+    __slots__ = ("streak_count", "has_freeze", "freeze_used_today", "gems")
+
+    streak_count: int
+    has_freeze: bool
+    freeze_used_today: bool
+    gems: int
+
+
 class DuolingoClient:
     """
     Client for interacting with Duolingo's API.
@@ -43,6 +88,20 @@ class DuolingoClient:
     Handles authentication, user data retrieval, and streak freeze purchases.
     """
 
+    __slots__ = (
+        "username",
+        "password",
+        "jwt_token",
+        "user_id",
+        "user_data",
+        "session",
+        "_login_url",
+        "_user_url",
+        "_user_url_full",
+        "_shop_url_template",
+        "_dirty",
+    )
+
     BASE_URL = "https://www.duolingo.com"
     API_VERSION = "2017-06-30"
 
@@ -67,11 +126,156 @@ class DuolingoClient:
         self.user_id: Optional[int] = None
         self.user_data: Optional[Dict] = None
 
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": self.USER_AGENT,
-            "Content-Type": "application/json",
-        })
+        # Endpoint URLs, built once per client
+        api_url = f"{self.BASE_URL}/{self.API_VERSION}"
+        self._login_url = f"{self.BASE_URL}/login"
+        self._user_url = f"{api_url}/users?username={quote(username, safe='')}&fields="
+        self._user_url_full = self._user_url + _DEFAULT_FIELDS
+        self._shop_url_template = api_url + "/users/{user_id}/shop-items"
+
+        # Set when cached user_data is known to be stale (e.g. after a purchase)
+        self._dirty = False
+
+        # HTTP/2 lets follow-up requests share one connection and compresses
+        # the repeated auth/UA headers. Idle connections stay pooled for 30s
+        # so the calls in one run reuse a single handshake. No custom
+        # transport is passed, so httpx still honours HTTP(S)_PROXY/NO_PROXY.
+        self.session = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=16,
+                max_keepalive_connections=4,
+                keepalive_expiry=30.0
+            ),
+            headers={
+                "User-Agent": self.USER_AGENT,
+                "Content-Type": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+            },
+            timeout=30.0,
+            follow_redirects=True
+        )
+
+    def close(self):
+        """Close the HTTP client and its pooled connections."""
+        self.session.close()
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        retry_statuses: frozenset = RETRY_STATUSES,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request, retrying failed connects and responses with a
+        transient status code.
+
+        Connect failures are retried for every method, since nothing has
+        reached the server yet.
+
+        Args:
+            method: HTTP method
+            url: Endpoint URL
+            retry_statuses: Status codes that trigger a retry
+            **kwargs: Passed through to httpx
+
+        Returns:
+            Raw response object (the last one if all retries fail)
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = RETRY_BACKOFF * (2 ** attempt)
+                logger.debug("Connect failed (%s), retrying in %.1fs...", e, delay)
+                time.sleep(delay)
+                continue
+
+            status = response.status_code
+            if status not in retry_statuses or attempt == MAX_RETRIES:
+                return response
+
+            retry_after = self._retry_after(response)
+            if retry_after is not None:
+                delay = min(retry_after, MAX_RETRY_AFTER)
+            elif status == 429:
+                # Rate limited without a hint - a quick retry would just hit
+                # the limiter again
+                return response
+            else:
+                delay = RETRY_BACKOFF * (2 ** attempt)
+
+            logger.debug("Got HTTP %d, retrying in %.1fs...", status, delay)
+            time.sleep(delay)
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        """
+        Read the Retry-After header of a response.
+
+        Args:
+            response: Response to inspect
+
+        Returns:
+            Seconds to wait, or None if the header is missing or invalid
+        """
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        # Otherwise it is an HTTP date
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def _post_json(
+        self,
+        url: str,
+        payload: Dict,
+        retry_statuses: frozenset = NO_RETRY_STATUSES
+    ) -> httpx.Response:
+        """
+        POST a JSON payload, serialized with orjson.
+
+        Args:
+            url: Endpoint URL
+            payload: Request body
+            retry_statuses: Status codes that trigger a retry (none by
+                default, since POSTs may not be safe to repeat)
+
+        Returns:
+            Raw response object
+        """
+        return self._request(
+            "POST", url, retry_statuses=retry_statuses, content=orjson.dumps(payload)
+        )
+
+    def _get_json(self, url: str) -> Dict:
+        """
+        GET a JSON endpoint and parse the body with orjson.
+
+        Args:
+            url: Endpoint URL
+
+        Returns:
+            Parsed response body
+        """
+        response = self._request("GET", url)
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
     def login(self) -> bool:
         """
@@ -83,15 +287,16 @@ class DuolingoClient:
         Raises:
             AuthenticationError: If login fails
         """
-        login_url = f"{self.BASE_URL}/login"
         payload = {
             "login": self.username,
             "password": self.password
         }
 
         try:
-            logger.info(f"Attempting to authenticate user: {self.username}")
-            response = self.session.post(login_url, json=payload, timeout=30)
+            logger.info("Attempting to authenticate user: %s", self.username)
+            response = self._post_json(
+                self._login_url, payload, retry_statuses=LOGIN_RETRY_STATUSES
+            )
 
             if response.status_code == 401:
                 raise AuthenticationError("Invalid username or password")
@@ -115,7 +320,7 @@ class DuolingoClient:
             })
 
             # Get user data to extract user_id
-            response_data = response.json()
+            response_data = orjson.loads(response.content)
             self.user_id = response_data.get("user_id")
 
             if not self.user_id:
@@ -123,10 +328,10 @@ class DuolingoClient:
                 user_info = self.get_user_data()
                 self.user_id = user_info.get("id")
 
-            logger.info(f"Successfully authenticated. User ID: {self.user_id}")
+            logger.info("Successfully authenticated. User ID: %s", self.user_id)
             return True
 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             raise AuthenticationError(f"Login request failed: {str(e)}")
 
     def get_user_data(self, fields: Optional[List[str]] = None) -> Dict:
@@ -135,6 +340,7 @@ class DuolingoClient:
 
         Args:
             fields: Optional list of specific fields to retrieve
+                (defaults to USER_FIELDS)
 
         Returns:
             Dictionary containing user data
@@ -145,20 +351,15 @@ class DuolingoClient:
         if not self.jwt_token:
             raise AuthenticationError("Not authenticated. Call login() first.")
 
-        # Construct API URL
+        # Construct API URL, always narrowed to the fields we need
         if fields:
-            fields_param = ",".join(fields)
-            url = f"{self.BASE_URL}/{self.API_VERSION}/users?username={self.username}&fields={fields_param}"
+            url = self._user_url + ",".join(fields)
         else:
-            # Get comprehensive user data
-            url = f"{self.BASE_URL}/{self.API_VERSION}/users?username={self.username}"
+            url = self._user_url_full
 
         try:
-            logger.debug(f"Fetching user data from: {url}")
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-
-            data = response.json()
+            logger.debug("Fetching user data from: %s", url)
+            data = self._get_json(url)
 
             # Handle response format - sometimes wrapped in 'users' array
             if "users" in data and len(data["users"]) > 0:
@@ -166,34 +367,46 @@ class DuolingoClient:
             else:
                 self.user_data = data
 
+            self._dirty = False
+
             # Update user_id if we didn't have it
             if not self.user_id and "id" in self.user_data:
                 self.user_id = self.user_data["id"]
 
             return self.user_data
 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             raise DuolingoAPIError(f"Failed to fetch user data: {str(e)}")
 
-    def get_gem_balance(self) -> int:
+    def _snapshot(self) -> UserSnapshot:
         """
-        Get current gem balance.
+        Read gem and streak state from the cached user data.
 
         Returns:
-            Number of gems available
+            UserSnapshot built from one lookup of user_data
         """
-        if not self.user_data:
+        if not self.user_data or self._dirty:
             self.get_user_data()
 
-        # Gems can be under different keys
-        gems = (
-            self.user_data.get("rupees") or
-            self.user_data.get("lingots") or
-            self.user_data.get("gems") or
-            0
+        data = self.user_data
+
+        return UserSnapshot(
+            streak_count=data.get("site_streak", 0),
+            has_freeze=data.get("inventory", {}).get("streak_freeze") is not None,
+            freeze_used_today=data.get("streak_extended_today", False),
+            # Gems can be under different keys
+            gems=data.get("rupees") or data.get("lingots") or data.get("gems") or 0,
         )
 
-        logger.info(f"Current gem balance: {gems}")
+    def get_gem_balance(self) -> int:
+        """
+        Get current gem balance.
+
+        Returns:
+            Number of gems available
+        """
+        gems = self._snapshot().gems
+        logger.info("Current gem balance: %d", gems)
         return gems
 
     def get_streak_info(self) -> Dict:
@@ -206,18 +419,26 @@ class DuolingoClient:
             - has_freeze: Whether user owns a streak freeze
             - freeze_used_today: Whether freeze was used today
         """
-        if not self.user_data:
-            self.get_user_data()
-
+        snapshot = self._snapshot()
         streak_info = {
-            "streak_count": self.user_data.get("site_streak", 0),
-            "has_freeze": self.user_data.get("inventory", {}).get("streak_freeze") is not None,
-            "freeze_used_today": self.user_data.get("streak_extended_today", False),
+            "streak_count": snapshot.streak_count,
+            "has_freeze": snapshot.has_freeze,
+            "freeze_used_today": snapshot.freeze_used_today,
         }
 
-        logger.info(f"Streak info: {streak_info}")
+        logger.info("Streak info: %s", streak_info)
         return streak_info
 
+    def get_user_snapshot(self) -> UserSnapshot:
+        """
+        Fetch fresh user data and read gem and streak status from it.
+
+        Returns:
+            UserSnapshot with gems, streak_count and has_freeze
+        """
+        self.get_user_data()
+        return self._snapshot()
+
     def purchase_streak_freeze(self, learning_language: str = "en") -> bool:
         """
         Purchase a streak freeze with gems.
@@ -236,18 +457,17 @@ class DuolingoClient:
         if not self.jwt_token or not self.user_id:
             raise AuthenticationError("Not authenticated. Call login() first.")
 
-        # Check current inventory first
-        streak_info = self.get_streak_info()
-        if streak_info["has_freeze"]:
+        # Check current inventory and gem balance in one pass
+        snapshot = self._snapshot()
+        if snapshot.has_freeze:
             logger.warning("User already owns a streak freeze")
             # May still try to purchase if Duolingo allows multiple
 
-        # Check gem balance
-        gems = self.get_gem_balance()
-        if gems < 200:  # Streak freeze costs 200 gems
-            raise InsufficientGemsError(f"Insufficient gems: {gems} (need 200)")
+        gems = snapshot.gems
+        if gems < STREAK_FREEZE_COST:
+            raise InsufficientGemsError(f"Insufficient gems: {gems} (need {STREAK_FREEZE_COST})")
 
-        purchase_url = f"{self.BASE_URL}/{self.API_VERSION}/users/{self.user_id}/shop-items"
+        purchase_url = self._shop_url_template.format(user_id=self.user_id)
         payload = {
             "itemName": "streak_freeze",
             "learningLanguage": learning_language
@@ -255,11 +475,11 @@ class DuolingoClient:
 
         try:
             logger.info("Attempting to purchase streak freeze...")
-            response = self.session.post(purchase_url, json=payload, timeout=30)
+            response = self._post_json(purchase_url, payload)
 
             # Handle specific error responses
             if response.status_code == 400:
-                error_data = response.json()
+                error_data = orjson.loads(response.content)
                 error_msg = error_data.get("message", "Unknown error")
 
                 if "ALREADY_HAVE_STORE_ITEM" in error_msg:
@@ -273,13 +493,12 @@ class DuolingoClient:
 
             logger.info("Successfully purchased streak freeze!")
 
-            # Refresh user data to reflect purchase
-            time.sleep(1)  # Brief pause before refreshing
-            self.get_user_data()
+            # Defer the refresh until someone actually needs fresh data
+            self._dirty = True
 
             return True
 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             raise DuolingoAPIError(f"Purchase request failed: {str(e)}")
 
     def needs_streak_freeze(self) -> bool:
@@ -3,109 +3,36 @@ Notification Service
 
 Sends email notifications for important streak and gem balance events.
 Supports SMTP-based email delivery (Gmail, SendGrid, etc.)
+
+smtplib and the email package are imported lazily, on the first send, so
+runs that never notify don't pay for them.
 """
 
-import smtplib
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from datetime import datetime
 
-logger = logging.getLogger(__name__)
-
-
-class NotificationService:
-    """
-    Handles email notifications for streak automation events.
-
-    Supports SMTP email delivery with customizable templates.
-    """
-
-    def __init__(
-        self,
-        smtp_host: str,
-        smtp_port: int,
-        smtp_username: str,
-        smtp_password: str,
-        recipient_email: str,
-        enabled: bool = True
-    ):
-        """
-        Initialize the notification service.
-
-        Args:
-            smtp_host: SMTP server hostname (e.g., smtp.gmail.com)
-            smtp_port: SMTP server port (usually 587 for TLS)
-            smtp_username: SMTP authentication username
-            smtp_password: SMTP authentication password
-            recipient_email: Email address to receive notifications
-            enabled: Whether notifications are enabled
-        """
-        self.smtp_host = smtp_host
-        self.smtp_port = smtp_port
-        self.smtp_username = smtp_username
-        self.smtp_password = smtp_password
-        self.recipient_email = recipient_email
-        self.enabled = enabled
-
-        if not self.enabled:
-            logger.info("Email notifications are disabled")
-
-    def _send_email(self, subject: str, body_html: str, body_text: str):
-        """
-        Send an email via SMTP.
-
-        Args:
-            subject: Email subject line
-            body_html: HTML email body
-            body_text: Plain text email body (fallback)
-        """
-        if not self.enabled:
-            logger.debug(f"[Notifications Disabled] Would send: {subject}")
-            return
-
-        try:
-            # Create message
-            message = MIMEMultipart("alternative")
-            message["From"] = self.smtp_username
-            message["To"] = self.recipient_email
-            message["Subject"] = subject
-
-            # Attach both plain text and HTML versions
-            part_text = MIMEText(body_text, "plain")
-            part_html = MIMEText(body_html, "html")
-
-            message.attach(part_text)
-            message.attach(part_html)
-
-            # Connect and send
-            logger.info(f"Sending email notification: {subject}")
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(message)
-
-            logger.info("✓ Email notification sent successfully")
+if TYPE_CHECKING:
+    import smtplib
 
-        except smtplib.SMTPException as e:
-            logger.error(f"Failed to send email notification: {e}")
-        except Exception as e:
-            logger.error(f"Unexpected error sending notification: {e}")
-
-    def send_low_gems_warning(self, current_gems: int, threshold: int):
-        """
-        Send warning that gem balance is running low.
+logger = logging.getLogger(__name__)
 
-        Args:
-            current_gems: Current gem count
-            threshold: Low gems threshold
-        """
-        subject = "⚠️ Duolingo Gems Running Low"
+# Bound once so rendering doesn't repeat the attribute lookup
+_now = datetime.now
 
-        body_html = f"""
+# Page wrapper around the HTML sections below; added once per email so
+# several notifications can share one document
+_HTML_PAGE_START = """
         <html>
         <body style="font-family: Arial, sans-serif; padding: 20px;">
+"""
+_HTML_PAGE_END = """
+        </body>
+        </html>
+        """
+
+# Email templates, rendered with str.format_map() only when a message is sent
+_LOW_GEMS_HTML = """
             <h2 style="color: #ff9600;">⚠️ Low Gems Warning</h2>
             <p>Your Duolingo gem balance is running low.</p>
 
@@ -120,11 +47,8 @@ class NotificationService:
             <p style="color: #666; font-size: 12px; margin-top: 30px;">
                 This is an automated notification from your Duo Streak Keeper.
             </p>
-        </body>
-        </html>
         """
-
-        body_text = f"""
+_LOW_GEMS_TEXT = """
 ⚠️ Low Gems Warning
 
 Your Duolingo gem balance is running low.
@@ -139,28 +63,14 @@ Consider earning more gems through lessons to maintain your streak protection.
 This is an automated notification from your Duo Streak Keeper.
         """
 
-        self._send_email(subject, body_html, body_text)
-
-    def send_out_of_gems_alert(self, current_gems: int, required_gems: int):
-        """
-        Send critical alert that user is out of gems.
-
-        Args:
-            current_gems: Current gem count
-            required_gems: Gems needed for streak freeze
-        """
-        subject = "🚨 Out of Gems - Streak At Risk!"
-
-        body_html = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; padding: 20px;">
+_OUT_OF_GEMS_HTML = """
             <h2 style="color: #dc3545;">🚨 Critical: Out of Gems</h2>
             <p><strong>You do not have enough gems to purchase a streak freeze!</strong></p>
 
             <div style="background-color: #f8d7da; border-left: 4px solid #dc3545; padding: 15px; margin: 20px 0;">
                 <strong>Current Balance:</strong> {current_gems} 💎<br>
                 <strong>Required:</strong> {required_gems} 💎<br>
-                <strong>Shortage:</strong> {required_gems - current_gems} 💎
+                <strong>Shortage:</strong> {shortage} 💎
             </div>
 
             <p><strong>Your streak is at risk!</strong> The automation service cannot purchase
@@ -175,20 +85,17 @@ This is an automated notification from your Duo Streak Keeper.
 
             <p style="color: #666; font-size: 12px; margin-top: 30px;">
                 This is an automated notification from your Duo Streak Keeper.<br>
-                Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+                Time: {time}
             </p>
-        </body>
-        </html>
         """
-
-        body_text = f"""
+_OUT_OF_GEMS_TEXT = """
 🚨 Critical: Out of Gems
 
 You do not have enough gems to purchase a streak freeze!
 
 Current Balance: {current_gems} gems
 Required: {required_gems} gems
-Shortage: {required_gems - current_gems} gems
+Shortage: {shortage} gems
 
 Your streak is at risk! The automation service cannot purchase
 streak freezes without sufficient gems.
@@ -200,28 +107,15 @@ What to do:
 
 ---
 This is an automated notification from your Duo Streak Keeper.
-Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+Time: {time}
         """
 
-        self._send_email(subject, body_html, body_text)
-
-    def send_purchase_success(self, gems_remaining: int):
-        """
-        Send notification that streak freeze was successfully purchased.
-
-        Args:
-            gems_remaining: Gems remaining after purchase
-        """
-        subject = "✅ Streak Freeze Purchased Successfully"
-
-        body_html = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; padding: 20px;">
+_PURCHASE_SUCCESS_HTML = """
             <h2 style="color: #28a745;">✅ Success!</h2>
             <p>A streak freeze has been successfully purchased and equipped.</p>
 
             <div style="background-color: #d4edda; border-left: 4px solid #28a745; padding: 15px; margin: 20px 0;">
-                <strong>Cost:</strong> 200 💎<br>
+                <strong>Cost:</strong> {cost} 💎<br>
                 <strong>Remaining Balance:</strong> {gems_remaining} 💎
             </div>
 
@@ -230,18 +124,15 @@ Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
             <p style="color: #666; font-size: 12px; margin-top: 30px;">
                 This is an automated notification from your Duo Streak Keeper.<br>
-                Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+                Time: {time}
             </p>
-        </body>
-        </html>
         """
-
-        body_text = f"""
+_PURCHASE_SUCCESS_TEXT = """
 ✅ Success!
 
 A streak freeze has been successfully purchased and equipped.
 
-Cost: 200 gems
+Cost: {cost} gems
 Remaining Balance: {gems_remaining} gems
 
 Your Duolingo streak is now protected. If you miss a day,
@@ -249,18 +140,10 @@ the streak freeze will automatically maintain your streak.
 
 ---
 This is an automated notification from your Duo Streak Keeper.
-Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+Time: {time}
         """
 
-        self._send_email(subject, body_html, body_text)
-
-    def send_streak_broken_alert(self):
-        """Send alert that the streak has been broken."""
-        subject = "💔 Duolingo Streak Broken"
-
-        body_html = """
-        <html>
-        <body style="font-family: Arial, sans-serif; padding: 20px;">
+_STREAK_BROKEN_HTML = """
             <h2 style="color: #dc3545;">💔 Streak Broken</h2>
             <p>Unfortunately, your Duolingo streak has been broken.</p>
 
@@ -280,11 +163,8 @@ Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
             <p style="color: #666; font-size: 12px; margin-top: 30px;">
                 This is an automated notification from your Duo Streak Keeper.
             </p>
-        </body>
-        </html>
         """
-
-        body_text = """
+_STREAK_BROKEN_TEXT = """
 💔 Streak Broken
 
 Unfortunately, your Duolingo streak has been broken.
@@ -302,20 +182,7 @@ You can start building your streak again by completing a lesson today!
 This is an automated notification from your Duo Streak Keeper.
         """
 
-        self._send_email(subject, body_html, body_text)
-
-    def send_error_notification(self, error_message: str):
-        """
-        Send notification about a system error.
-
-        Args:
-            error_message: Description of the error
-        """
-        subject = "❌ Duo Streak Keeper Error"
-
-        body_html = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; padding: 20px;">
+_ERROR_HTML = """
             <h2 style="color: #dc3545;">❌ System Error</h2>
             <p>An error occurred in your Duo Streak Keeper automation:</p>
 
@@ -328,13 +195,10 @@ This is an automated notification from your Duo Streak Keeper.
 
             <p style="color: #666; font-size: 12px; margin-top: 30px;">
                 This is an automated notification from your Duo Streak Keeper.<br>
-                Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+                Time: {time}
             </p>
-        </body>
-        </html>
         """
-
-        body_text = f"""
+_ERROR_TEXT = """
 ❌ System Error
 
 An error occurred in your Duo Streak Keeper automation:
@@ -346,7 +210,276 @@ Please check your configuration and credentials.
 
 ---
 This is an automated notification from your Duo Streak Keeper.
-Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+Time: {time}
         """
 
-        self._send_email(subject, body_html, body_text)
+
+class NotificationService:
+    """
+    Handles email notifications for streak automation events.
+
+    Supports SMTP email delivery with customizable templates. The send_*
+    methods only queue a message; nothing is emailed until flush() (or
+    close(), which flushes first) is called at the end of a run.
+    """
+
+    __slots__ = (
+        "smtp_host",
+        "smtp_port",
+        "smtp_username",
+        "smtp_password",
+        "recipient_email",
+        "enabled",
+        "_smtp",
+        "_pending",
+    )
+
+    def __init__(
+        self,
+        smtp_host: str,
+        smtp_port: int,
+        smtp_username: str,
+        smtp_password: str,
+        recipient_email: str,
+        enabled: bool = True
+    ):
+        """
+        Initialize the notification service.
+
+        Args:
+            smtp_host: SMTP server hostname (e.g., smtp.gmail.com)
+            smtp_port: SMTP server port (465 for implicit TLS, 587 for STARTTLS)
+            smtp_username: SMTP authentication username
+            smtp_password: SMTP authentication password
+            recipient_email: Email address to receive notifications
+            enabled: Whether notifications are enabled
+        """
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.smtp_username = smtp_username
+        self.smtp_password = smtp_password
+        self.recipient_email = recipient_email
+        self.enabled = enabled
+
+        # Persistent SMTP connection, opened lazily on the first send
+        self._smtp: Optional["smtplib.SMTP"] = None
+
+        # Rendered (subject, html, text) messages waiting for flush()
+        self._pending: List[Tuple[str, str, str]] = []
+
+        if not self.enabled:
+            logger.info("Email notifications are disabled")
+
+    def _get_connection(self) -> "smtplib.SMTP":
+        """
+        Get an authenticated SMTP connection, reusing the cached one if alive.
+
+        Returns:
+            Connected and logged-in SMTP server object
+        """
+        import smtplib
+        import ssl
+
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except (smtplib.SMTPException, OSError):
+                logger.debug("SMTP connection dropped, reconnecting...")
+                try:
+                    self._smtp.close()
+                except OSError:
+                    pass
+                self._smtp = None
+
+        # Both paths verify the server certificate with the same context
+        context = ssl.create_default_context()
+
+        # Port 465 speaks TLS from the start, saving the STARTTLS round trip
+        if self.smtp_port == 465:
+            server = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port, context=context)
+        else:
+            server = smtplib.SMTP(self.smtp_host, self.smtp_port)
+
+        try:
+            server.ehlo()
+            if self.smtp_port != 465:
+                server.starttls(context=context)
+            server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+
+        self._smtp = server
+        return server
+
+    def close(self):
+        """Send any queued notifications, then close the SMTP connection."""
+        self.flush()
+
+        if self._smtp is None:
+            return
+
+        import smtplib
+
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        finally:
+            self._smtp = None
+
+    def _render_and_queue(self, subject: str, html_template: str, text_template: str, values: dict):
+        """
+        Render an email template and queue it for the next flush().
+
+        Rendering is skipped entirely when notifications are disabled.
+
+        Args:
+            subject: Email subject line
+            html_template: HTML body template
+            text_template: Plain text body template
+            values: Template substitution values
+        """
+        if not self.enabled:
+            logger.debug("[Notifications Disabled] Would send: %s", subject)
+            return
+
+        values["time"] = _now().strftime("%Y-%m-%d %H:%M:%S")
+        self._pending.append((
+            subject,
+            html_template.format_map(values),
+            text_template.format_map(values)
+        ))
+
+    def flush(self):
+        """
+        Send all queued notifications as a single email.
+
+        A lone notification is sent unchanged; several are combined into
+        one message so a run never costs more than one send.
+        """
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, []
+
+        if len(pending) == 1:
+            subject, body_html, body_text = pending[0]
+        else:
+            subject = f"Duo Streak Keeper: {len(pending)} events"
+            body_html = "<hr>".join(html for _, html, _ in pending)
+            body_text = "\n---\n".join(text for _, _, text in pending)
+
+        self._send_email(subject, _HTML_PAGE_START + body_html + _HTML_PAGE_END, body_text)
+
+    def _send_email(self, subject: str, body_html: str, body_text: str):
+        """
+        Send an email via SMTP.
+
+        Args:
+            subject: Email subject line
+            body_html: HTML email body
+            body_text: Plain text email body (fallback)
+        """
+        if not self.enabled:
+            logger.debug("[Notifications Disabled] Would send: %s", subject)
+            return
+
+        import smtplib
+        from email.message import EmailMessage
+
+        try:
+            # Create message
+            message = EmailMessage()
+            message["From"] = self.smtp_username
+            message["To"] = self.recipient_email
+            message["Subject"] = subject
+
+            # Plain text body with an HTML alternative
+            message.set_content(body_text)
+            message.add_alternative(body_html, subtype="html")
+
+            # Connect and send
+            logger.info("Sending email notification: %s", subject)
+            server = self._get_connection()
+            server.send_message(message)
+
+            logger.info("✓ Email notification sent successfully")
+
+        except smtplib.SMTPException as e:
+            logger.error("Failed to send email notification: %s", e)
+        except Exception as e:
+            logger.error("Unexpected error sending notification: %s", e)
+
+    def send_low_gems_warning(self, current_gems: int, threshold: int):
+        """
+        Queue a warning that gem balance is running low.
+
+        Sent on the next flush().
+
+        Args:
+            current_gems: Current gem count
+            threshold: Low gems threshold
+        """
+        values = {"current_gems": current_gems, "threshold": threshold}
+        self._render_and_queue(
+            "⚠️ Duolingo Gems Running Low", _LOW_GEMS_HTML, _LOW_GEMS_TEXT, values
+        )
+
+    def send_out_of_gems_alert(self, current_gems: int, required_gems: int):
+        """
+        Queue a critical alert that user is out of gems.
+
+        Sent on the next flush().
+
+        Args:
+            current_gems: Current gem count
+            required_gems: Gems needed for streak freeze
+        """
+        values = {
+            "current_gems": current_gems,
+            "required_gems": required_gems,
+            "shortage": required_gems - current_gems,
+        }
+        self._render_and_queue(
+            "🚨 Out of Gems - Streak At Risk!", _OUT_OF_GEMS_HTML, _OUT_OF_GEMS_TEXT, values
+        )
+
+    def send_purchase_success(self, gems_remaining: int, cost: int):
+        """
+        Queue a notification that streak freeze was successfully purchased.
+
+        Sent on the next flush().
+
+        Args:
+            gems_remaining: Gems remaining after purchase
+            cost: Gems spent on the streak freeze
+        """
+        values = {"gems_remaining": gems_remaining, "cost": cost}
+        self._render_and_queue(
+            "✅ Streak Freeze Purchased Successfully",
+            _PURCHASE_SUCCESS_HTML,
+            _PURCHASE_SUCCESS_TEXT,
+            values
+        )
+
+    def send_streak_broken_alert(self):
+        """Queue an alert that the streak has been broken (sent on the next flush())."""
+        self._render_and_queue(
+            "💔 Duolingo Streak Broken", _STREAK_BROKEN_HTML, _STREAK_BROKEN_TEXT, {}
+        )
+
+    def send_error_notification(self, error_message: str):
+        """
+        Queue a notification about a system error.
+
+        Sent on the next flush().
+
+        Args:
+            error_message: Description of the error
+        """
+        values = {"error_message": error_message}
+        self._render_and_queue(
+            "❌ Duo Streak Keeper Error", _ERROR_HTML, _ERROR_TEXT, values
+        )
@@ -8,19 +8,143 @@ purchasing streak freezes when needed.
     Use at your own risk.
 """
 
+import json
 import logging
-from typing import Optional
+import os
+import time
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
 from duolingo_api import (
     DuolingoClient,
     InsufficientGemsError,
     AlreadyOwnedError,
     DuolingoAPIError,
-    AuthenticationError
+    AuthenticationError,
+    UserSnapshot,
+    STREAK_FREEZE_COST
 )
-from notifications import NotificationService
+
+if TYPE_CHECKING:
+    from notifications import NotificationService
 
 logger = logging.getLogger(__name__)
 
+# How long (seconds) a fetched gem/streak snapshot may be reused
+SNAPSHOT_MAX_AGE = 30
+
+_BANNER = "=" * 60
+
+# Result prefix for each handled API error, most specific class first
+_ERR_PREFIX = {
+    AuthenticationError: "Authentication error",
+    DuolingoAPIError: "API error",
+}
+_HANDLED_ERRORS = tuple(_ERR_PREFIX)
+
+_STATUS_TEMPLATE = (
+    "╔══════════════════════════════════════════════════════════╗\n"
+    "║         DUOLINGO STREAK STATUS REPORT                     ║\n"
+    "╠══════════════════════════════════════════════════════════╣\n"
+    "║ Streak:         {streak} days\n"
+    "║ Streak Freeze:  {freeze}\n"
+    "║ Gem Balance:    {gems} 💎\n"
+    "║ Status:         {status}\n"
+    "╚══════════════════════════════════════════════════════════╝"
+)
+
+
+class NotificationGate:
+    """
+    Sends each kind of notification at most once until it is reset.
+
+    Keys name the notification (e.g. 'low_gems'); a key stays marked as
+    sent until reset() clears it. When a state file is given, sent flags
+    are saved there so separate runs on the same day don't repeat alerts.
+    """
+
+    def __init__(self, state_path: Optional[Path] = None):
+        """
+        Initialize the gate.
+
+        Args:
+            state_path: JSON file to persist sent flags in (None to keep
+                them in memory only)
+        """
+        self.state_path = state_path
+        self._sent: Dict[str, bool] = {}
+
+        if self.state_path is not None:
+            self._load()
+
+    def _load(self):
+        """Load today's sent flags from the state file, if present."""
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable notification state %s: %s", self.state_path, e)
+            return
+
+        # Flags expire daily
+        if not isinstance(state, dict) or state.get("date") != date.today().isoformat():
+            return
+
+        self._sent = {
+            name[:-len("_notified")]: True
+            for name, sent in state.items()
+            if name.endswith("_notified") and sent
+        }
+
+    def _save(self):
+        """Atomically write the current sent flags to the state file."""
+        if self.state_path is None:
+            return
+
+        state = {"date": date.today().isoformat()}
+        state.update({f"{key}_notified": sent for key, sent in self._sent.items()})
+
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.warning("Could not save notification state %s: %s", self.state_path, e)
+
+    def fire(self, key: str, fn: Optional[Callable], *args) -> bool:
+        """
+        Call fn(*args) unless key was already sent or fn is None.
+
+        Args:
+            key: Notification name
+            fn: Notifier method to call (None when notifications are off)
+            *args: Arguments passed to fn
+
+        Returns:
+            True if the notification was sent
+        """
+        if self._sent.get(key) or fn is None:
+            return False
+
+        fn(*args)
+        self._sent[key] = True
+        self._save()
+        return True
+
+    def reset(self, *keys: str):
+        """
+        Allow the given notifications to be sent again.
+
+        Args:
+            *keys: Notification names to clear
+        """
+        cleared = [key for key in keys if self._sent.pop(key, None)]
+        if cleared:
+            self._save()
+
 
 class StreakManager:
     """
@@ -30,13 +154,26 @@ class StreakManager:
     freezes when needed and sending notifications for important events.
     """
 
+    __slots__ = (
+        "client",
+        "notifier",
+        "low_gems_threshold",
+        "min_gems_required",
+        "dry_run",
+        "gate",
+        "_do_purchase",
+        "_gem_rules",
+        "_snapshot_cache",
+    )
+
     def __init__(
         self,
         duolingo_client: DuolingoClient,
-        notification_service: Optional[NotificationService] = None,
+        notification_service: Optional["NotificationService"] = None,
         low_gems_threshold: int = 600,
         min_gems_required: int = 200,
-        dry_run: bool = False
+        dry_run: bool = False,
+        state_path: Optional[Path] = Path(".streak_state.json")
     ):
         """
         Initialize the Streak Manager.
@@ -47,17 +184,82 @@ class StreakManager:
             low_gems_threshold: Gems level to trigger low balance warning
             min_gems_required: Minimum gems needed to purchase freeze
             dry_run: If True, log actions but don't actually purchase
+            state_path: File that remembers sent notifications across runs
+                (None to keep that state in memory only)
         """
         self.client = duolingo_client
         self.notifier = notification_service
         self.low_gems_threshold = low_gems_threshold
         self.min_gems_required = min_gems_required
         self.dry_run = dry_run
+        self._do_purchase = self._purchase_dry_run if dry_run else self._purchase_real
 
         # Track notification state to avoid spamming
-        self.low_gems_notified = False
-        self.out_of_gems_notified = False
-        self.streak_broken_notified = False
+        self.gate = NotificationGate(state_path)
+
+        # Gem balance warnings as (applies, gate key, send, log label),
+        # checked in order; only the first matching rule fires
+        self._gem_rules = [
+            (
+                lambda balance: balance < self.min_gems_required,
+                "out_of_gems",
+                lambda balance: self.notifier.send_out_of_gems_alert(balance, self.min_gems_required),
+                "OUT OF GEMS",
+            ),
+            (
+                lambda balance: balance < self.low_gems_threshold,
+                "low_gems",
+                lambda balance: self.notifier.send_low_gems_warning(balance, self.low_gems_threshold),
+                "LOW GEMS WARNING",
+            ),
+        ]
+
+        # (monotonic timestamp, snapshot) from the last refresh
+        self._snapshot_cache: Optional[Tuple[float, UserSnapshot]] = None
+
+    def _get_snapshot(self, max_age: float = SNAPSHOT_MAX_AGE) -> UserSnapshot:
+        """
+        Get current gem and streak status, reusing a recent fetch if possible.
+
+        Args:
+            max_age: Maximum age in seconds of a cached snapshot
+
+        Returns:
+            UserSnapshot with gems, streak_count and has_freeze
+        """
+        now = time.monotonic()
+        if self._snapshot_cache is not None:
+            fetched_at, snapshot = self._snapshot_cache
+            if now - fetched_at < max_age:
+                return snapshot
+
+        snapshot = self.client.get_user_snapshot()
+        self._snapshot_cache = (now, snapshot)
+        return snapshot
+
+    @staticmethod
+    def _result(
+        *,
+        success: bool,
+        action_taken: str,
+        gems_remaining: int,
+        has_freeze: bool,
+        streak_count: int = 0
+    ) -> dict:
+        """
+        Build a status dictionary with the shape every result shares.
+
+        Returns:
+            Dictionary with success, action_taken, gems_remaining,
+            has_freeze and streak_count
+        """
+        return {
+            "success": success,
+            "action_taken": action_taken,
+            "gems_remaining": gems_remaining,
+            "has_freeze": has_freeze,
+            "streak_count": streak_count,
+        }
 
     def check_and_maintain_streak(self) -> dict:
         """
@@ -72,155 +274,224 @@ class StreakManager:
             - streak_count: int
         """
         try:
-            logger.info("=" * 60)
-            logger.info("Starting streak maintenance check...")
-            logger.info("=" * 60)
-
-            # Refresh user data
-            self.client.refresh_data()
-
-            # Get current status
-            gem_balance = self.client.get_gem_balance()
-            streak_info = self.client.get_streak_info()
-
-            logger.info(f"Current streak: {streak_info['streak_count']} days")
-            logger.info(f"Gem balance: {gem_balance}")
-            logger.info(f"Has streak freeze: {streak_info['has_freeze']}")
-
-            status = {
-                "success": True,
-                "action_taken": "No action needed",
-                "gems_remaining": gem_balance,
-                "has_freeze": streak_info["has_freeze"],
-                "streak_count": streak_info["streak_count"]
-            }
-
-            # Check if we need to purchase a streak freeze
-            if not streak_info["has_freeze"]:
-                logger.info("No streak freeze detected. Attempting purchase...")
-                purchase_result = self._purchase_freeze_if_possible(gem_balance)
-                status.update(purchase_result)
-            else:
-                logger.info("✓ Streak freeze already equipped")
-                status["action_taken"] = "Streak freeze already equipped"
-
-                # Still check gem balance for warnings
-                self._check_gem_balance_warnings(gem_balance)
-
-            logger.info(f"Status: {status['action_taken']}")
-            logger.info("=" * 60)
-
-            return status
-
-        except AuthenticationError as e:
-            logger.error(f"Authentication failed: {e}")
-            return {
-                "success": False,
-                "action_taken": f"Authentication error: {e}",
-                "gems_remaining": 0,
-                "has_freeze": False,
-                "streak_count": 0
-            }
+            return self._maintain()
+        except _HANDLED_ERRORS as e:
+            return self._error_response(e)
 
-        except DuolingoAPIError as e:
-            logger.error(f"API error occurred: {e}")
-            if self.notifier:
-                self.notifier.send_error_notification(str(e))
-            return {
-                "success": False,
-                "action_taken": f"API error: {e}",
-                "gems_remaining": 0,
-                "has_freeze": False,
-                "streak_count": 0
-            }
+    def _maintain(self) -> dict:
+        """
+        Run the maintenance check, letting API errors propagate.
 
-    def _purchase_freeze_if_possible(self, gem_balance: int) -> dict:
+        Returns:
+            Status dictionary as described in check_and_maintain_streak()
+        """
+        # Get current status
+        snapshot = self._get_snapshot()
+        gem_balance = snapshot.gems
+        has_freeze = snapshot.has_freeze
+        streak_count = snapshot.streak_count
+
+        # One multi-line record instead of six separate handler calls
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n".join([
+                _BANNER,
+                "Starting streak maintenance check...",
+                _BANNER,
+                f"Current streak: {streak_count} days",
+                f"Gem balance: {gem_balance}",
+                f"Has streak freeze: {has_freeze}",
+            ]))
+
+        # Check if we need to purchase a streak freeze
+        if not has_freeze:
+            logger.info("No streak freeze detected. Attempting purchase...")
+            status = self._purchase_freeze_if_possible(gem_balance, streak_count)
+        else:
+            logger.info("✓ Streak freeze already equipped")
+            status = self._result(
+                success=True,
+                action_taken="Streak freeze already equipped",
+                gems_remaining=gem_balance,
+                has_freeze=True,
+                streak_count=streak_count
+            )
+
+            # Still check gem balance for warnings
+            self._check_gem_balance_warnings(gem_balance)
+
+        logger.info("Status: %s", status['action_taken'])
+        logger.info(_BANNER)
+
+        return status
+
+    def _error_response(self, error: DuolingoAPIError) -> dict:
+        """
+        Log an API failure and build the matching failed result.
+
+        Args:
+            error: Exception raised during the maintenance check
+
+        Returns:
+            Failed status dictionary
+        """
+        prefix = next(
+            _ERR_PREFIX[cls] for cls in type(error).__mro__ if cls in _ERR_PREFIX
+        )
+        logger.error("%s: %s", prefix, error)
+
+        # Bad credentials aren't worth an email; other API failures are
+        if self.notifier and not isinstance(error, AuthenticationError):
+            self.notifier.send_error_notification(str(error))
+
+        return self._result(
+            success=False,
+            action_taken=f"{prefix}: {error}",
+            gems_remaining=0,
+            has_freeze=False
+        )
+
+    def maintain_and_report(self) -> Tuple[dict, str]:
+        """
+        Run the maintenance check and build the status report from its result.
+
+        Equivalent to check_and_maintain_streak() followed by
+        get_status_report(), without fetching user data a second time.
+
+        Returns:
+            Tuple of (status dictionary, formatted status report)
+        """
+        try:
+            status = self._maintain()
+        except _HANDLED_ERRORS as e:
+            return self._error_response(e), f"Error generating status report: {e}"
+
+        report = self._format_report(
+            status["streak_count"], status["has_freeze"], status["gems_remaining"]
+        )
+        return status, report
+
+    def _purchase_freeze_if_possible(self, gem_balance: int, streak_count: int) -> dict:
         """
         Attempt to purchase a streak freeze if gems allow.
 
         Args:
             gem_balance: Current gem count
+            streak_count: Current streak length, carried into the result
 
         Returns:
             Dictionary with purchase result details
         """
         # Check if we have enough gems
         if gem_balance < self.min_gems_required:
-            logger.warning(f"⚠️  INSUFFICIENT GEMS: {gem_balance} (need {self.min_gems_required})")
+            logger.warning("⚠️  INSUFFICIENT GEMS: %d (need %d)", gem_balance, self.min_gems_required)
+
+            self.gate.fire(
+                "out_of_gems",
+                self.notifier and self.notifier.send_out_of_gems_alert,
+                gem_balance,
+                self.min_gems_required
+            )
+
+            return self._result(
+                success=False,
+                action_taken="Insufficient gems to purchase streak freeze",
+                gems_remaining=gem_balance,
+                has_freeze=False,
+                streak_count=streak_count
+            )
 
-            if not self.out_of_gems_notified and self.notifier:
-                self.notifier.send_out_of_gems_alert(gem_balance, self.min_gems_required)
-                self.out_of_gems_notified = True
+        # We have enough gems - purchase the freeze
+        return self._do_purchase(gem_balance, streak_count)
 
-            return {
-                "success": False,
-                "action_taken": "Insufficient gems to purchase streak freeze",
-                "gems_remaining": gem_balance,
-                "has_freeze": False
-            }
+    def _purchase_dry_run(self, gem_balance: int, streak_count: int) -> dict:
+        """
+        Log the purchase that would be made, without buying anything.
 
-        # We have enough gems - purchase the freeze
-        try:
-            if self.dry_run:
-                logger.info(f"[DRY RUN] Would purchase streak freeze (cost: 200 gems)")
-                new_balance = gem_balance - 200
-                logger.info(f"[DRY RUN] New balance would be: {new_balance} gems")
-
-                return {
-                    "success": True,
-                    "action_taken": "[DRY RUN] Would have purchased streak freeze",
-                    "gems_remaining": new_balance,
-                    "has_freeze": False  # Not really purchased
-                }
+        Args:
+            gem_balance: Current gem count
+            streak_count: Current streak length
 
+        Returns:
+            Dictionary with the simulated purchase result
+        """
+        logger.info("[DRY RUN] Would purchase streak freeze (cost: %d gems)", STREAK_FREEZE_COST)
+        new_balance = gem_balance - STREAK_FREEZE_COST
+        logger.info("[DRY RUN] New balance would be: %d gems", new_balance)
+
+        return self._result(
+            success=True,
+            action_taken="[DRY RUN] Would have purchased streak freeze",
+            gems_remaining=new_balance,
+            has_freeze=False,  # Not really purchased
+            streak_count=streak_count
+        )
+
+    def _purchase_real(self, gem_balance: int, streak_count: int) -> dict:
+        """
+        Purchase a streak freeze through the Duolingo API.
+
+        Args:
+            gem_balance: Current gem count
+            streak_count: Current streak length
+
+        Returns:
+            Dictionary with purchase result details
+        """
+        try:
             # Actually purchase the freeze
             logger.info("💎 Purchasing streak freeze...")
             self.client.purchase_streak_freeze()
+            self._snapshot_cache = None
 
             # Calculate new balance
-            new_balance = gem_balance - 200
-            logger.info(f"✓ Successfully purchased streak freeze!")
-            logger.info(f"New gem balance: {new_balance}")
+            new_balance = gem_balance - STREAK_FREEZE_COST
+            logger.info("✓ Successfully purchased streak freeze!")
+            logger.info("New gem balance: %d", new_balance)
 
             # Send success notification
             if self.notifier:
-                self.notifier.send_purchase_success(new_balance)
+                self.notifier.send_purchase_success(new_balance, STREAK_FREEZE_COST)
 
             # Reset notification flags on successful purchase
-            self.low_gems_notified = False
-            self.out_of_gems_notified = False
+            self.gate.reset("low_gems", "out_of_gems")
 
             # Check if new balance is low
             self._check_gem_balance_warnings(new_balance)
 
-            return {
-                "success": True,
-                "action_taken": "Purchased streak freeze",
-                "gems_remaining": new_balance,
-                "has_freeze": True
-            }
+            return self._result(
+                success=True,
+                action_taken="Purchased streak freeze",
+                gems_remaining=new_balance,
+                has_freeze=True,
+                streak_count=streak_count
+            )
 
         except AlreadyOwnedError:
             logger.info("Already own maximum streak freezes (2)")
-            return {
-                "success": True,
-                "action_taken": "Already own maximum streak freezes",
-                "gems_remaining": gem_balance,
-                "has_freeze": True
-            }
+            return self._result(
+                success=True,
+                action_taken="Already own maximum streak freezes",
+                gems_remaining=gem_balance,
+                has_freeze=True,
+                streak_count=streak_count
+            )
 
         except InsufficientGemsError as e:
-            logger.error(f"Purchase failed: {e}")
-            if self.notifier and not self.out_of_gems_notified:
-                self.notifier.send_out_of_gems_alert(gem_balance, self.min_gems_required)
-                self.out_of_gems_notified = True
-
-            return {
-                "success": False,
-                "action_taken": str(e),
-                "gems_remaining": gem_balance,
-                "has_freeze": False
-            }
+            logger.error("Purchase failed: %s", e)
+            self.gate.fire(
+                "out_of_gems",
+                self.notifier and self.notifier.send_out_of_gems_alert,
+                gem_balance,
+                self.min_gems_required
+            )
+
+            return self._result(
+                success=False,
+                action_taken=str(e),
+                gems_remaining=gem_balance,
+                has_freeze=False,
+                streak_count=streak_count
+            )
 
     def _check_gem_balance_warnings(self, gem_balance: int):
         """
@@ -229,44 +500,46 @@ class StreakManager:
         Args:
             gem_balance: Current gem count
         """
-        if gem_balance < self.min_gems_required:
-            # Out of gems
-            if not self.out_of_gems_notified and self.notifier:
-                logger.warning(f"⚠️  OUT OF GEMS: {gem_balance}")
-                self.notifier.send_out_of_gems_alert(gem_balance, self.min_gems_required)
-                self.out_of_gems_notified = True
+        # Healthy balance (the usual case) - no rule can apply
+        if gem_balance >= self.low_gems_threshold and gem_balance >= self.min_gems_required:
+            return
 
-        elif gem_balance < self.low_gems_threshold:
-            # Low gems warning
-            if not self.low_gems_notified and self.notifier:
-                logger.warning(f"⚠️  LOW GEMS WARNING: {gem_balance}")
-                self.notifier.send_low_gems_warning(gem_balance, self.low_gems_threshold)
-                self.low_gems_notified = True
+        for applies, key, send, label in self._gem_rules:
+            if applies(gem_balance):
+                if self.gate.fire(key, self.notifier and send, gem_balance):
+                    logger.warning("⚠️  %s: %d", label, gem_balance)
+                break
 
-    def check_for_broken_streak(self) -> bool:
+    def check_for_broken_streak(self, force_refresh: bool = False) -> bool:
         """
         Check if the streak has been broken.
 
+        Uses the cached snapshot when it is recent enough, since a streak
+        count that is a few seconds old is fine for this check.
+
+        Args:
+            force_refresh: If True, always fetch fresh data from the API
+
         Returns:
             True if streak is 0 or has dropped, False otherwise
         """
         try:
-            self.client.refresh_data()
-            streak_info = self.client.get_streak_info()
+            snapshot = self._get_snapshot(max_age=0 if force_refresh else SNAPSHOT_MAX_AGE)
 
-            if streak_info["streak_count"] == 0:
+            if snapshot.streak_count == 0:
                 logger.error("💔 STREAK HAS BEEN BROKEN!")
 
-                if not self.streak_broken_notified and self.notifier:
-                    self.notifier.send_streak_broken_alert()
-                    self.streak_broken_notified = True
+                self.gate.fire(
+                    "streak_broken",
+                    self.notifier and self.notifier.send_streak_broken_alert
+                )
 
                 return True
 
             return False
 
         except DuolingoAPIError as e:
-            logger.error(f"Failed to check streak status: {e}")
+            logger.error("Failed to check streak status: %s", e)
             return False
 
     def get_status_report(self) -> str:
@@ -277,22 +550,32 @@ class StreakManager:
             Formatted status string
         """
         try:
-            self.client.refresh_data()
-            gem_balance = self.client.get_gem_balance()
-            streak_info = self.client.get_streak_info()
-
-            report = f"""
-╔══════════════════════════════════════════════════════════╗
-║         DUOLINGO STREAK STATUS REPORT                     ║
-╠══════════════════════════════════════════════════════════╣
-║ Streak:         {streak_info['streak_count']} days
-║ Streak Freeze:  {'✓ Equipped' if streak_info['has_freeze'] else '✗ Not equipped'}
-║ Gem Balance:    {gem_balance} 💎
-║ Status:         {'⚠️ LOW GEMS' if gem_balance < self.low_gems_threshold else '✓ Healthy'}
-╚══════════════════════════════════════════════════════════╝
-            """
-
-            return report.strip()
+            snapshot = self._get_snapshot()
+            return self._format_report(
+                snapshot.streak_count, snapshot.has_freeze, snapshot.gems
+            )
 
         except DuolingoAPIError as e:
             return f"Error generating status report: {e}"
+
+    def _format_report(self, streak_count: int, has_freeze: bool, gem_balance: int) -> str:
+        """
+        Fill in the status report template.
+
+        Args:
+            streak_count: Current streak length
+            has_freeze: Whether a streak freeze is equipped
+            gem_balance: Current gem count
+
+        Returns:
+            Formatted status string
+        """
+        freeze_mark = '✓ Equipped' if has_freeze else '✗ Not equipped'
+        status_mark = '⚠️ LOW GEMS' if gem_balance < self.low_gems_threshold else '✓ Healthy'
+
+        return _STATUS_TEMPLATE.format(
+            streak=streak_count,
+            freeze=freeze_mark,
+            gems=gem_balance,
+            status=status_mark
+        )